@@ -0,0 +1,28 @@
+"""
+JSON (de)serialization using `orjson` when installed (`speedups` extra), otherwise the standard `json` module.
+"""
+
+import json
+from json import JSONDecodeError  # Parent of `orjson.JSONDecodeError`, catches errors of both implementations
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+if orjson:
+    def dumps(obj) -> str:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS).decode()
+
+    def dumps_bytes(obj) -> bytes:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS)
+
+    loads = orjson.loads
+else:
+    def dumps(obj) -> str:
+        return json.dumps(obj)
+
+    def dumps_bytes(obj) -> bytes:
+        return json.dumps(obj).encode()
+
+    loads = json.loads
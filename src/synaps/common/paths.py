@@ -12,8 +12,9 @@ Discussion:
 import getpass
 import os
 import re
+from functools import lru_cache
 from pathlib import Path
-from typing import List, Optional
+from typing import Dict, List, Optional, Tuple
 
 API_SOCKET = 'synaps.sock'
 CONFIG_DIR = 'synaps'
@@ -22,6 +23,8 @@ RPIO_CONFIG_FILE = 'rpio.toml'
 MQTT_CONFIG_FILE = 'mqtt.toml'
 WS_CONFIG_FILE = 'ws.toml'
 
+_KNOWN_CONFIG_FILES = (SENSORS_CONFIG_FILE, RPIO_CONFIG_FILE, MQTT_CONFIG_FILE, WS_CONFIG_FILE)
+
 
 class ConfigFileNotFoundError(FileNotFoundError):
 
@@ -58,15 +61,37 @@ def lookup_file_in_config_path(file) -> Path:
     :return: config file path
     :raise FileNotFoundError: when config lookup failed
     """
-    search_path = service_config_file_search_path()
-    for config_dir in search_path:
-        config = config_dir / file
-        if config.exists():
-            return config
+    search_path, file_candidates = _config_file_candidates()
+    candidates = file_candidates.get(file)
+    if candidates is None:
+        search_path = service_config_file_search_path()
+        candidates = [os.path.join(config_dir, file) for config_dir in search_path]
+
+    for config in candidates:
+        if os.path.exists(config):
+            return Path(config)
 
     raise ConfigFileNotFoundError(file, search_path)
 
 
+@lru_cache(maxsize=None)
+def _config_file_candidates() -> Tuple[List[Path], Dict[str, List[str]]]:
+    """
+    :return: the search path and candidate paths of the known config files, computed on the first lookup
+    """
+    search_path = service_config_file_search_path()
+    return search_path, {file: [os.path.join(config_dir, file) for config_dir in search_path]
+                         for file in _KNOWN_CONFIG_FILES}
+
+
+def refresh_config_file_candidates():
+    """
+    Drop the cached candidate paths of the known config files, they are recomputed on the next lookup.
+    Must be called when the config search path changes (env variables, working directory).
+    """
+    _config_file_candidates.cache_clear()
+
+
 def service_config_file_search_path(*, exclude_cwd=False) -> List[Path]:
     search_path = []
 
@@ -231,3 +256,4 @@ def lock_path(lock_name: str, create: bool) -> Path:
     """
 
     return lock_dir(create) / lock_name
+
@@ -8,7 +8,10 @@ class SwitchState(Enum):
     RELEASED = auto()
 
 
-@dataclass
+_SWITCH_STATE_NAMES = {state: state.name.lower() for state in SwitchState}
+
+
+@dataclass(frozen=True)
 class SwitchEvent:
     device_id: str
     switch_state: SwitchState
@@ -17,7 +20,7 @@ class SwitchEvent:
     def serialize(self) -> dict:
         return {
             "device_id": self.device_id,
-            "switch_state": self.switch_state.name.lower(),
+            "switch_state": _SWITCH_STATE_NAMES[self.switch_state],
             "switch_id": self.switch_id,
         }
 
@@ -0,0 +1,23 @@
+import time
+from datetime import datetime, timezone
+
+_second_cache = (0, '')  # (epoch seconds, ISO formatted without the fraction and the offset)
+# Bound once to skip global and attribute lookups for every event
+_time = time.time
+_fromtimestamp = datetime.fromtimestamp
+_UTC = timezone.utc
+
+
+def event_at() -> str:
+    """
+    :return: ISO formatted current UTC time with millisecond precision (e.g. 2024-05-30T06:25:13.929+00:00),
+             the date and time part is formatted only once per second
+    """
+    global _second_cache
+    epoch_ms = int(_time() * 1000)
+    secs, ms = divmod(epoch_ms, 1000)
+    cached_secs, formatted = _second_cache
+    if secs != cached_secs:
+        formatted = _fromtimestamp(secs, _UTC).replace(tzinfo=None).isoformat()
+        _second_cache = (secs, formatted)
+    return f"{formatted}.{ms:03d}+00:00"
@@ -1,12 +1,11 @@
 import asyncio
 import logging
 import signal
+import tomllib
 from asyncio import Event
-from typing import Optional
+from typing import Optional, Awaitable, Dict
 
-import aiofiles
 import rich_click as click
-import tomli
 
 import synaps.service.rpio
 from sensation.common import SensorType
@@ -29,10 +28,10 @@ shutdown_event: Optional[Event] = None
 def register_signal_handlers():
     loop = asyncio.get_running_loop()
     for s in (signal.SIGTERM, signal.SIGINT):
-        loop.add_signal_handler(s, lambda: asyncio.create_task(on_signal(s)))
+        loop.add_signal_handler(s, on_signal, s)
 
 
-async def on_signal(signal_):
+def on_signal(signal_):
     logger.info(f"[exit_signal_received] service=[synapsd] signal=[{signal_.name}]")
     shutdown_event.set()
 
@@ -53,12 +52,18 @@ def cli(log_file_level):
     except Exception:
         logger.exception("[service_failed] service=[synapsd]")
         exit(1)
+    finally:
+        log.shutdown()
 
 
 async def run_service():
     global shutdown_event
     shutdown_event = Event()
 
+    if hasattr(asyncio, 'eager_task_factory'):  # Python 3.12+
+        # Tasks completing without suspension (missing config files) skip the scheduling round-trip
+        asyncio.get_running_loop().set_task_factory(asyncio.eager_task_factory)
+
     register_signal_handlers()
 
     init_success = await initialize()  # Throws APINotStarted
@@ -77,12 +82,27 @@ async def run_service():
 
 
 async def initialize():
+    # Config files are read and parsed while the API is starting, i.e. before the single instance check.
+    # They are applied only after the API started.
+    config_reads = [
+        asyncio.create_task(read_config_file(config_file))
+        for config_file in (MQTT_CONFIG_FILE, WS_CONFIG_FILE, SENSORS_CONFIG_FILE, RPIO_CONFIG_FILE)
+    ]
+    mqtt_config, ws_config, sensors_config, rpio_config = config_reads
+    await asyncio.sleep(0)  # Let the reads hand off to worker threads before the blocking API ping
+
     # First start API to prevent the service to run more than one instance
-    await start_api()  # Raising exceptions if not started
+    try:
+        await start_api()  # Raising exceptions if not started
+    except Exception:
+        await asyncio.gather(*config_reads, return_exceptions=True)  # Retrieve results to not leak task exceptions
+        raise
 
     # Continue with init after API started successfully
     # TODO Init sensors last?
-    results = await asyncio.gather(init_mqtt(), init_ws(), init_sensors(), init_rpio(), return_exceptions=True)
+    results = await asyncio.gather(
+        init_mqtt(mqtt_config), init_ws(ws_config), init_sensors(sensors_config), init_rpio(rpio_config),
+        return_exceptions=True)
 
     success = True
     for result in results:
@@ -125,18 +145,21 @@ def missing_mqtt_config_field(field, config):
     missing_config_field('mqtt_broker', field, config)
 
 
+def _read_and_parse_toml(config_file):
+    with open(config_file, 'rb') as f:
+        return tomllib.load(f)
+
+
 async def read_config_file(filename):
     config_file = paths.lookup_file_in_config_path(filename)
 
     logger.info(f"[loading_config_file] file=[{config_file}]")
-    async with aiofiles.open(config_file, 'rb') as f:
-        content = await f.read()
-    return tomli.loads(content.decode())
+    return await asyncio.to_thread(_read_and_parse_toml, config_file)
 
 
-async def init_mqtt():
+async def init_mqtt(config_read: Awaitable[Dict]):
     try:
-        config = await read_config_file(MQTT_CONFIG_FILE)
+        config = await config_read
     except ConfigFileNotFoundError:
         return
 
@@ -161,9 +184,9 @@ async def unregister_mqtt():
     await mqtt.unregister_all()
 
 
-async def init_ws():
+async def init_ws(config_read: Awaitable[Dict]):
     try:
-        config = await read_config_file(WS_CONFIG_FILE)
+        config = await config_read
     except ConfigFileNotFoundError:
         return
 
@@ -188,9 +211,9 @@ async def unregister_ws():
     await ws.unregister_all()
 
 
-async def init_sensors():
+async def init_sensors(config_read: Awaitable[Dict]):
     try:
-        config = await read_config_file(SENSORS_CONFIG_FILE)
+        config = await config_read
     except ConfigFileNotFoundError as e:
         logger.info(f"[no_sensors_config_file] detail=[{e}]")
         return
@@ -231,9 +254,9 @@ async def register_sensor_by_type(sensor_config):
     raise UnknownSensorType(sensor_config["type"])
 
 
-async def init_rpio():
+async def init_rpio(config_read: Awaitable[Dict]):
     try:
-        config = await read_config_file(RPIO_CONFIG_FILE)
+        config = await config_read
     except ConfigFileNotFoundError as e:
         logger.info(f"[no_rpio_config_file] detail=[{e}]")
         return
@@ -256,7 +279,11 @@ async def init_rpio():
             continue
         if KINCONY_SERVER_MINI.lower() != platform_type.lower():
             raise InvalidConfiguration(f"Unknown RPIO platform `{platform_type}`, supported: {[KINCONY_SERVER_MINI]}")
-        ksm.register(conf)
+        try:
+            ksm.register(conf)
+        except AlreadyRegistered:
+            logger.warning(f"[invalid_rpio_platform] reason=[duplicated_host] config=[{platform_config}]")
+            continue
         # TODO Move this log statement to ksm
         logger.info("[rpio_registered] platform=[%s] host=[%s]", platform_type, conf['host'])
 
@@ -279,9 +306,8 @@ async def start_api():
 
 
 async def unregister_devices():
-    await sen0395.unregister_all()
-    await sen0311.unregister_all()
-    ksm.unregister_all()
+    # Closing the RPIO platforms performs blocking pigpio calls, run them in a worker thread
+    await asyncio.gather(sen0395.unregister_all(), sen0311.unregister_all(), asyncio.to_thread(ksm.unregister_all))
 
 
 async def stop_api():
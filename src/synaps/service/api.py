@@ -1,15 +1,13 @@
 import asyncio
-import json
 import logging
 import os
 from abc import ABC, abstractmethod
-from json import JSONDecodeError
 
 import synaps.service.sen0395
 from sensation.sen0395 import Command
 from synaps import common
 from synaps.cli.client import APIClient
-from synaps.common import paths, sen0311
+from synaps.common import paths, sen0311, fastjson
 from synaps.common.sen0395 import SensorStatuses, SensorConfigChainResponse, SensorCommandResponse, SensorConfigs
 from synaps.common.socket import SocketServerAsync, SocketServerStoppedAlready
 from synaps.service.err import ServiceAlreadyRunning
@@ -25,11 +23,14 @@ def _create_socket_name():
 
 class _ApiError(Exception):
 
-    def __init__(self, code, error):
+    def __init__(self, code, error, *, response_template=None):
         self.code = code
         self.error = error
+        self.response_template = response_template
 
     def create_response(self, id=None):
+        if self.response_template:
+            return self.response_template % fastjson.dumps(id)
         return _resp_err(self.code, self.error, id)
 
 
@@ -42,7 +43,7 @@ def _no_sensor_error(sensor) -> _ApiError:
 
 
 def _no_sensors_error() -> _ApiError:
-    return _ApiError(-32002, f"No sensors found")
+    return _ApiError(-32002, "No sensors found", response_template=_NO_SENSORS_RESP_TEMPLATE)
 
 
 def _unknown_command_error(cmd) -> _ApiError:
@@ -54,12 +55,8 @@ def _resp_ok(result, id=None):
 
 
 def _resp(result, id=None):
-    resp = {
-        "jsonrpc": "2.0",
-        "result": result,
-        "id": id
-    }
-    return json.dumps(resp)
+    # The envelope is fixed, only the result and the ID need to be serialized
+    return f'{{"jsonrpc":"2.0","result":{fastjson.dumps(result)},"id":{fastjson.dumps(id)}}}'
 
 
 def _resp_err(code: int, message: str, id=None):
@@ -72,7 +69,21 @@ def _resp_err(code: int, message: str, id=None):
         "id": id
     }
 
-    return json.dumps(err_resp)
+    return fastjson.dumps(err_resp)
+
+
+def _resp_err_template(code: int, message: str):
+    """
+    :return: serialized error response with `%s` placeholder for the serialized request ID
+    """
+    prefix = _resp_err(code, message)[:-len('null}')]  # `id` is the last field
+    return prefix.replace('%', '%%') + '%s}'
+
+
+_PARSE_ERROR_RESP = _resp_err(-32700, "Parse error")
+_INVALID_REQUEST_RESP = _resp_err(-32600, "Invalid Request")
+_INTERNAL_ERROR_RESP_TEMPLATE = _resp_err_template(-32603, "Internal error")
+_NO_SENSORS_RESP_TEMPLATE = _resp_err_template(-32002, "No sensors found")
 
 
 class APIMethod(ABC):
@@ -96,7 +107,7 @@ def _get_sensors(sensor_name):
         if not sensor:
             raise _no_sensor_error(sensor_name)
 
-        return [sensor]
+        return (sensor,)
 
     sensors = synaps.service.sen0395.get_all_sensors()
 
@@ -106,6 +117,16 @@ def _get_sensors(sensor_name):
     return sensors
 
 
+async def _send_command(sensor, cmd, args):
+    cmd_resp = await sensor.send_command(cmd, *args)
+    return SensorCommandResponse(sensor.sensor_id, cmd_resp).serialize()
+
+
+async def _configure(sensor, cmd, args):
+    config_resp = await sensor.configure(cmd, *args)
+    return SensorConfigChainResponse(sensor.sensor_id, config_resp).serialize()
+
+
 class APISen0395Command(APIMethod):
 
     @property
@@ -122,13 +143,7 @@ class APISen0395Command(APIMethod):
 
         args = params.get('args') or ()
 
-        command_responses = await asyncio.gather(*(sensor.send_command(cmd, *args) for sensor in sensors))
-
-        responses = [
-            SensorCommandResponse(sensor.sensor_id, cmd_resp).serialize()
-            for sensor, cmd_resp in zip(sensors, command_responses)
-        ]
-
+        responses = await asyncio.gather(*(_send_command(sensor, cmd, args) for sensor in sensors))
         return {"sensor_command_responses": responses}
 
     def validate(self, params):
@@ -155,13 +170,7 @@ class APISen0395Configure(APIMethod):
 
         args = params.get('args') or ()
 
-        config_responses = await asyncio.gather(*(sensor.configure(cmd, *args) for sensor in sensors))
-
-        responses = [
-            SensorConfigChainResponse(sensor.sensor_id, resp).serialize()
-            for sensor, resp in zip(sensors, config_responses)
-        ]
-
+        responses = await asyncio.gather(*(_configure(sensor, cmd, args) for sensor in sensors))
         return {"sensor_config_chain_responses": responses}
 
     def validate(self, params):
@@ -178,7 +187,7 @@ class APISen0395Status(APIMethod):
     async def handle(self, params):
         sensors = _get_sensors(params.get('name'))
         statuses = await asyncio.gather(*(sensor.status() for sensor in sensors))
-        return SensorStatuses(list(statuses)).serialize()
+        return SensorStatuses(statuses).serialize()
 
 
 class APISen0395Config(APIMethod):
@@ -190,7 +199,7 @@ class APISen0395Config(APIMethod):
     async def handle(self, params):
         sensors = _get_sensors(params.get('name'))
         configs = await asyncio.gather(*(sensor.config() for sensor in sensors))
-        return SensorConfigs(list(configs)).serialize()
+        return SensorConfigs(configs).serialize()
 
 
 async def set_reading(sensor, enabled):
@@ -219,7 +228,7 @@ class APISen0395Reading(APIMethod):
 
         statuses = await asyncio.gather(*(set_reading(sensor, enabled) for sensor in sensors))
 
-        return SensorStatuses(list(statuses)).serialize()
+        return SensorStatuses(statuses).serialize()
 
 
 class APISen0311Status(APIMethod):
@@ -235,15 +244,15 @@ class APISen0311Status(APIMethod):
             if not sensor:
                 raise _no_sensor_error(sensor_name)
 
-            return [sensor]
+            sensors = (sensor,)
+        else:
+            sensors = synaps.service.sen0311.get_all_sensors()
 
-        sensors = synaps.service.sen0311.get_all_sensors()
-
-        if not sensors:
-            raise _no_sensors_error()
+            if not sensors:
+                raise _no_sensors_error()
 
         statuses = await asyncio.gather(*(sensor.status() for sensor in sensors))
-        return sen0311.SensorStatuses(list(statuses)).serialize()
+        return sen0311.SensorStatuses(statuses).serialize()
 
 
 DEFAULT_METHODS =\
@@ -251,50 +260,64 @@ DEFAULT_METHODS =\
      APISen0311Status())
 
 
+def _validator(method: APIMethod):
+    """
+    :return: bound `validate` method or None if the method doesn't override the no-op default
+    """
+    if type(method).validate is APIMethod.validate:
+        return None
+
+    return method.validate
+
+
 class APIServer(SocketServerAsync):
 
     def __init__(self, socket_path, methods=DEFAULT_METHODS):
         super().__init__(socket_path, allow_ping=True)  # Allow ping for stale socket check
-        self._methods = {method.method: method for method in methods}
+        self._handlers = {method.method: (_validator(method), method.handle) for method in methods}
 
     async def handle(self, req):
         try:
-            req_body = json.loads(req)
-        except JSONDecodeError as e:
+            req_body = fastjson.loads(req)
+        except fastjson.JSONDecodeError as e:
             log.warning(f"event=[invalid_json_request_body] length=[{e}]")
-            return _resp_err(-32700, "Parse error")
+            return _PARSE_ERROR_RESP
 
         if 'jsonrpc' not in req_body or req_body['jsonrpc'] != '2.0':
-            return _resp_err(-32600, "Invalid Request")
+            return _INVALID_REQUEST_RESP
 
         if 'method' not in req_body:
-            return _resp_err(-32600, "Invalid Request")
+            return _INVALID_REQUEST_RESP
 
         method_name = req_body['method']
         params = req_body.get('params', {})
         request_id = req_body.get('id')
 
         try:
-            method = self._resolve_method(method_name)
-            method.validate(params)
+            validate, handle = self._resolve_handlers(method_name)
+            if validate:
+                validate(params)
         except _ApiError as e:
             return e.create_response(request_id)
 
         try:
-            result = await method.handle(params)
+            result = await handle(params)
             return _resp_ok(result, request_id)
         except _ApiError as e:
             return e.create_response(request_id)
         except Exception:
             log.error("event=[api_handler_error]", exc_info=True)
-            return _resp_err(-32603, "Internal error", request_id)
-
-    def _resolve_method(self, method_name) -> APIMethod:
-        method = self._methods.get(method_name)
-        if not method:
+            return _INTERNAL_ERROR_RESP_TEMPLATE % fastjson.dumps(request_id)
+
+    def _resolve_handlers(self, method_name):
+        """
+        :return: bound `validate` (None if not overridden) and `handle` methods of the API method
+        """
+        handlers = self._handlers.get(method_name)
+        if not handlers:
             raise _ApiError(-32601, f"Method not found: {method_name}")
 
-        return method
+        return handlers
 
 
 _api_server = APIServer(paths.api_socket_path())
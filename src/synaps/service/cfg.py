@@ -4,14 +4,19 @@ from synaps.service.err import MissingConfigurationField, InvalidConfiguration
 
 
 class Config:
+    """
+    Read-only view of configuration data. Nested values are converted on the first access and memoized.
+    """
 
     def __init__(self, field_path: str, data: Mapping):
         self.field_path = field_path
         self._data = data
+        self._converted = {}
 
     def get(self, key: str, default: Any = None) -> Any:
-        value = self._data.get(key, default)
-        return self._convert_value(f"{self.field_path}.{key}", value)
+        if key not in self._data:
+            return self._convert_value(f"{self.field_path}.{key}", default)
+        return self._get_converted(key)
 
     def get_list(self, key: str) -> List:
         value = self._data.get(key)
@@ -19,18 +24,27 @@ class Config:
             return []
         if isinstance(value, str):
             raise InvalidConfiguration(f"`{self.field_path}.{key}` must be a list, not a string")
+        if isinstance(value, Mapping):
+            raise InvalidConfiguration(f"`{self.field_path}.{key}` must be a list, not a table")
         if not isinstance(value, Iterable):
             raise InvalidConfiguration(f"`{self.field_path}.{key}` must be iterable")
-        return [self._convert_value(f"{self.field_path}.{key}[{i}]", item) for i, item in enumerate(value)]
+        return self._get_converted(key)
 
     def __getitem__(self, key: str) -> Any:
         if key not in self._data:
             raise MissingConfigurationField(f"{self.field_path}.{key}")
-        return self._convert_value(f"{self.field_path}.{key}", self._data[key])
+        return self._get_converted(key)
 
     def __contains__(self, key: str) -> bool:
         return key in self._data
 
+    def _get_converted(self, key: str) -> Any:
+        try:
+            return self._converted[key]
+        except KeyError:
+            value = self._converted[key] = self._convert_value(f"{self.field_path}.{key}", self._data[key])
+            return value
+
     def _convert_value(self, field_path: str, value: Any) -> Any:
         if isinstance(value, Mapping):
             return Config(field_path, value)
@@ -1,14 +1,17 @@
+import asyncio
 import logging
 from enum import Enum
-from typing import List, Union
+from itertools import chain
+from typing import List, Union, Callable, Any, Dict, Optional
 
 from gpiozero import Button, OutputDevice
 from gpiozero.pins.pigpio import PiGPIOFactory
 
-from synaps.common.switch import SwitchState
+from synaps.common.relay import RelayEvent, RelayState
+from synaps.common.switch import SwitchState, SwitchEvent
 from synaps.service import mqtt, ws
 from synaps.service.cfg import Config
-from synaps.service.err import InvalidConfiguration
+from synaps.service.err import InvalidConfiguration, AlreadyRegistered
 from synaps.service.rpio import RpioPlatform, InputSwitch, OutputRelay, link_switch_to_relay
 
 log = logging.getLogger(__name__)
@@ -22,8 +25,11 @@ def register(platform_config):
     """
     Impl note: Make sure this call is never blocked as it is called from async event thread
     """
-    kincony_server_mini = create_platform(platform_config)
-    _servers[kincony_server_mini.host] = kincony_server_mini
+    host = platform_config["host"]
+    if host in _servers:
+        raise AlreadyRegistered
+
+    _servers[host] = create_platform(platform_config)
 
 
 class DigitalInput(Enum):
@@ -67,13 +73,19 @@ class DigitalInput(Enum):
                 raise InvalidConfiguration(
                     f"platform.switch.digital_input value `{input_id}` cannot be converted to integer")
 
-        # Try to get the enum value by input_id
-        for input_enum in cls:
-            if input_enum.input_id == input_id:
-                return input_enum
+        try:
+            digital_input = _DIGITAL_INPUTS_BY_ID.get(input_id)
+        except TypeError:  # Unhashable
+            digital_input = None
+
+        if not digital_input:
+            raise InvalidConfiguration(
+                f"platform.switch.digital_input value `{input_id}` is not between 1-8")
+
+        return digital_input
 
-        raise InvalidConfiguration(
-            f"platform.switch.digital_input value `{input_id}` is not between 1-8")
+
+_DIGITAL_INPUTS_BY_ID = {di.input_id: di for di in DigitalInput}
 
 
 class RelayChannel(Enum):
@@ -116,11 +128,18 @@ class RelayChannel(Enum):
                 raise InvalidConfiguration(
                     f"platform.relay.relay_channel value `{channel_number}` cannot be converted to integer")
 
-        for relay_enum in cls:
-            if relay_enum.channel_number == channel_number:
-                return relay_enum
+        try:
+            relay_channel = _RELAY_CHANNELS_BY_NUMBER.get(channel_number)
+        except TypeError:  # Unhashable
+            relay_channel = None
+
+        if not relay_channel:
+            raise InvalidConfiguration(f"platform.relay.relay_channel value `{channel_number}` is not between 1-8")
 
-        raise InvalidConfiguration(f"platform.relay.relay_channel value `{channel_number}` is not between 1-8")
+        return relay_channel
+
+
+_RELAY_CHANNELS_BY_NUMBER = {rc.channel_number: rc for rc in RelayChannel}
 
 
 class KinconyServerMini(RpioPlatform):
@@ -138,33 +157,118 @@ class KinconyServerMini(RpioPlatform):
         self.pin_factory.close()
 
 
+_RELAY_EVENT_DATA = {state: {"state": state.name.lower()} for state in RelayState}  # Shared, must not be modified
+
+
+def _relay_event_data(event: RelayEvent):
+    return _RELAY_EVENT_DATA[event.state]
+
+
+def _switch_event_data(event: SwitchEvent):
+    return event.serialize()
+
+
+class _MqttSimplePayload:
+    """Observer publishing the simple value (ON/OFF) of a switch or relay event to an MQTT topic"""
+
+    __slots__ = ('publisher',)
+
+    def __init__(self, broker, topic):
+        self.publisher = mqtt.get_publisher(broker, topic)
+
+    def __call__(self, event):
+        self.publisher(event.as_simple_value())
+
+
+class _MqttDeviceEvent:
+    """Observer publishing a switch or relay event as a device event to the topics of an MQTT broker"""
+
+    __slots__ = ('broker', 'topics', 'device_id', 'event_type', 'event_data')
+
+    def __init__(self, broker, topics, device_id, event_type, event_data: Callable[[Any], Dict[str, Any]]):
+        self.broker = broker
+        self.topics = topics
+        self.device_id = device_id
+        self.event_type = event_type
+        self.event_data = event_data
+
+    def __call__(self, event):
+        mqtt.send_device_events(self.broker, self.topics, self.device_id, self.event_type, self.event_data(event))
+
+
+def _add_mqtt_device_event_observers(device, event_topics: Dict[str, List[str]], device_id, event_type, event_data):
+    """Add one observer per broker publishing the device events to all its topics"""
+    for broker, topics in event_topics.items():
+        device.add_observer(_MqttDeviceEvent(broker, tuple(topics), device_id, event_type, event_data))
+
+
+class _WsDeviceEvent:
+    """Observer sending a switch or relay event as a device event to a WebSocket endpoint"""
+
+    __slots__ = ('endpoint', 'device_id', 'event_type', 'event_data')
+
+    def __init__(self, endpoint, device_id, event_type, event_data: Callable[[Any], Dict[str, Any]]):
+        self.endpoint = endpoint
+        self.device_id = device_id
+        self.event_type = event_type
+        self.event_data = event_data
+
+    async def __call__(self, event):
+        await ws.send_device_event(self.endpoint, self.device_id, self.event_type, self.event_data(event))
+
+
+def _log_event_observer(host):
+    def observer(event):
+        if log.isEnabledFor(logging.INFO):
+            log.info("[ksm_event] host=[%s] event=[%s]", host, event)
+
+    return observer
+
+
 def create_platform(conf: Config):
     host = conf["host"]
+    event_loop = asyncio.get_running_loop()  # Resolved once for all switches and relays of the platform
     factory = PiGPIOFactory(host=host)
+    devices = []  # Created so far, closed on failure before the factory
 
-    relays = create_relays(factory, conf)
-    switches = create_switches(factory, conf, relays)
+    try:
+        relays = create_relays(factory, conf, event_loop=event_loop, devices=devices)
+        switches = create_switches(factory, conf, relays, event_loop=event_loop, devices=devices)
+    except Exception:
+        for device in devices:
+            try:
+                device.close()
+            except Exception:
+                log.exception("[ksm_device_close_failed] host=[%s] device=[%s]", host, device)
+        factory.close()
+        raise
 
     platform = KinconyServerMini(factory, switches, relays)
 
     if conf.get("log_events"):
-        platform.add_observer_switches(lambda e: log.info(f"[ksm_event] host=[{platform.host}] event=[e]"))
+        platform.add_observer_switches(_log_event_observer(host))
 
     return platform
 
 
-def create_relays(factory: PiGPIOFactory, platform_config: Config) -> List[OutputRelay]:
+def create_relays(factory: PiGPIOFactory, platform_config: Config, *,
+                  event_loop: Optional[asyncio.AbstractEventLoop] = None,
+                  devices: Optional[List] = None) -> List[OutputRelay]:
     """
     Create relay objects based on configuration and add them to the platform
 
     Args:
         platform_config: Configuration object containing relay settings
         factory: PiGPIOFactory for creating output devices
+        event_loop: Loop running async observers of the relays, the running loop if not provided
+        devices: If provided, created output devices are appended to it
 
     Returns:
         List of created KsmRelay objects
     """
     relays = []
+    platform_mqtt = platform_config.get_list("mqtt")
+    platform_ws = platform_config.get_list("ws")
 
     for relay_conf in platform_config.get_list("relay"):
         relay_ch = RelayChannel.get_by_channel_number(relay_conf["channel"])
@@ -175,25 +279,23 @@ def create_relays(factory: PiGPIOFactory, platform_config: Config) -> List[Outpu
             active_high=relay_conf.get("active_high", True),
             initial_value=relay_conf.get("initial_state", False)
         )
-        relay = OutputRelay(device_id, output_device, initial_state=relay_conf.get("initial_state"))
+        if devices is not None:
+            devices.append(output_device)
+        relay = OutputRelay(device_id, output_device, initial_state=relay_conf.get("initial_state"),
+                            event_loop=event_loop)
         relays.append(relay)
 
-        for mc in (platform_config.get_list("mqtt") + relay_conf.get_list("mqtt")):
+        event_topics = {}
+        for mc in chain(platform_mqtt, relay_conf.get_list("mqtt")):
             broker = mc['broker']
             state_topic = mc.get('state_topic') or mc.get('topic')
             command_topic = mc.get('command_topic')
 
             if state_topic:
                 if 'simple' == mc.get('payload'):
-                    relay.add_observer(
-                        lambda event, b=broker, t=state_topic:
-                        mqtt.send_device_payload(b, t, event.as_simple_value())
-                    )
+                    relay.add_observer(_MqttSimplePayload(broker, state_topic))
                 else:
-                    relay.add_observer(
-                        lambda event, b=broker, t=state_topic, d=device_id:
-                        mqtt.send_device_event(b, t, d, "relay_state_change", {"state": event.state.name.lower()})
-                    )
+                    event_topics.setdefault(broker, []).append(state_topic)
 
             if command_topic:
                 def make_handler(r):
@@ -211,17 +313,17 @@ def create_relays(factory: PiGPIOFactory, platform_config: Config) -> List[Outpu
 
                 mqtt.subscribe(broker, command_topic, make_handler(relay))
 
-        for wc in (platform_config.get_list("ws") + relay_conf.get_list("ws")):
+        _add_mqtt_device_event_observers(relay, event_topics, device_id, "relay_state_change", _relay_event_data)
+
+        for wc in chain(platform_ws, relay_conf.get_list("ws")):
             endpoint = wc['endpoint']
-            relay.add_observer(
-                lambda event, e=endpoint, d=device_id:
-                ws.send_device_event(e, d, "relay_state_change", {"state": event.state.name.lower()})
-            )
+            relay.add_observer(_WsDeviceEvent(endpoint, device_id, "relay_state_change", _relay_event_data))
 
     return relays
 
 
-def create_switches(factory, conf, relays: List[OutputRelay]):
+def create_switches(factory, conf, relays: List[OutputRelay], *,
+                    event_loop: Optional[asyncio.AbstractEventLoop] = None, devices: Optional[List] = None):
     device_to_relay = {r.device_id: r for r in relays}
     switches = []
     bounce_time = None
@@ -229,33 +331,32 @@ def create_switches(factory, conf, relays: List[OutputRelay]):
     if global_switch_conf := conf.get("switches", None):
         bounce_time = global_switch_conf.get("bounce_time", None)
 
+    platform_mqtt = conf.get_list("mqtt")
+    platform_ws = conf.get_list("ws")
+
     for switch_conf in conf.get_list("switch"):
         di = DigitalInput.get_by_id(switch_conf["digital_input"])
         dev_id = switch_conf["device_id"]
         button = Button(pin=di.gpio_pin, pin_factory=factory, bounce_time=bounce_time or switch_conf.get("bounce_time"))
-        switch = InputSwitch(dev_id, button)
+        if devices is not None:
+            devices.append(button)
+        switch = InputSwitch(dev_id, button, event_loop=event_loop)
         switches.append(switch)
 
-        for mc in (conf.get_list("mqtt") + switch_conf.get_list("mqtt")):
+        event_topics = {}
+        for mc in chain(platform_mqtt, switch_conf.get_list("mqtt")):
             broker = mc['broker']
             topic = mc['topic']
             if 'simple' == mc.get('payload'):
-                switch.add_observer(
-                    lambda event, b=broker, t=topic:
-                    mqtt.send_device_payload(b, t, event.as_simple_value())
-                )
+                switch.add_observer(_MqttSimplePayload(broker, topic))
             else:
-                switch.add_observer(
-                    lambda event, b=broker, t=topic, d=dev_id:
-                    mqtt.send_device_event(b, t, d, "switch_state_change", event.serialize())
-                )
+                event_topics.setdefault(broker, []).append(topic)
+
+        _add_mqtt_device_event_observers(switch, event_topics, dev_id, "switch_state_change", _switch_event_data)
 
-        for wc in (conf.get_list("ws") + switch_conf.get_list("ws")):
+        for wc in chain(platform_ws, switch_conf.get_list("ws")):
             endpoint = wc['endpoint']
-            switch.add_observer(
-                lambda event, e=endpoint, d=dev_id:
-                ws.send_device_event(e, d, "switch_state_change", event.serialize())
-            )
+            switch.add_observer(_WsDeviceEvent(endpoint, dev_id, "switch_state_change", _switch_event_data))
 
         for rlink_conf in switch_conf.get_list("relay_link"):
             toggle_on_str = rlink_conf.get("toggle_on", SwitchState.RELEASED.name)
@@ -264,7 +365,7 @@ def create_switches(factory, conf, relays: List[OutputRelay]):
             except KeyError:
                 valid_states = ", ".join(state.name.lower() for state in SwitchState)
                 raise InvalidConfiguration(f"Invalid state value `{toggle_on_str}`, valid: `{valid_states}`")
-            matching_relay = device_to_relay[rlink_conf["device"]]
+            matching_relay = device_to_relay.get(rlink_conf["device"])
             if not matching_relay:
                 raise InvalidConfiguration(f'Linked relay devices not found: `{rlink_conf["device"]}`')
 
@@ -274,6 +375,6 @@ def create_switches(factory, conf, relays: List[OutputRelay]):
 
 
 def unregister_all():
-    for host, platform in list(_servers.items()):
+    while _servers:
+        _, platform = _servers.popitem()
         platform.close()
-        del _servers[host]
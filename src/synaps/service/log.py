@@ -1,6 +1,9 @@
 import logging
+import queue
 from logging import handlers
+from typing import Optional
 
+from rich.highlighter import NullHighlighter
 from rich.logging import RichHandler
 
 from synaps.common import expand_user, paths
@@ -16,36 +19,66 @@ DEF_FORMATTER = logging.Formatter('%(asctime)s - %(levelname)-5s - %(name)s - %(
 
 STDOUT_HANDLER_NAME = 'stdout-handler'
 FILE_HANDLER_NAME = 'file-handler'
+QUEUE_HANDLER_NAME = 'queue-handler'
+
+_listener: Optional[handlers.QueueListener] = None
+
+
+class _UnformattedQueueHandler(handlers.QueueHandler):
+    """
+    The stock `prepare` formats the record, including the exception traceback, in the logging thread.
+    Records stay in this process, so they are enqueued as they are and formatted by the listener handlers.
+    """
+
+    def prepare(self, record):
+        return record
 
 
 def configure(enabled, log_file_level='info', log_file_path=None):
+    """
+    Records are only enqueued by the logging threads (GPIO callbacks, event loop),
+    formatting and writing is done by the handlers in a background listener thread.
+    """
     if not enabled:
         synapsd_logger.disabled = True
         sensation_logger.disabled = True
         return
 
-    setup_console('DEBUG')
+    output_handlers = [setup_console('DEBUG')]
 
     if log_file_level != 'off':
         level = logging.getLevelName(log_file_level.upper())
         log_file_path = expand_user(log_file_path) or paths.log_file_path(create=True)
-        setup_file(level, log_file_path)
+        output_handlers.append(setup_file(level, log_file_path))
         if level < synapsd_logger.getEffectiveLevel():
             synapsd_logger.setLevel(level)
             sensation_logger.setLevel(level)
 
+    setup_queue(output_handlers)
+
+
+def shutdown():
+    """
+    Stop the listener thread after all enqueued records are processed.
+    """
+    global _listener
+    if _listener:
+        _listener.stop()
+        _listener = None
+
 
 def is_disabled():
     return synapsd_logger.disabled
 
 
 def setup_console(level):
-    stdout_handler = RichHandler(show_path=False, log_time_format="[%X]")
+    # Messages are plain `[event] key=[value]` records, skip repr highlighting regexes and keyword matching
+    stdout_handler = RichHandler(show_path=False, log_time_format="[%X]", highlighter=NullHighlighter(), keywords=[])
     stdout_handler.set_name(STDOUT_HANDLER_NAME)
     stdout_handler.setLevel(level)
     stdout_handler.setFormatter(STDOUT_FORMATTER)
     # stdout_handler.addFilter(lambda record: record.levelno <= logging.INFO)
-    register_handler(stdout_handler)
+    return stdout_handler
 
 
 def setup_file(level, file):
@@ -53,7 +86,20 @@ def setup_file(level, file):
     file_handler.set_name(FILE_HANDLER_NAME)
     file_handler.setLevel(level)
     file_handler.setFormatter(DEF_FORMATTER)
-    register_handler(file_handler)
+    return file_handler
+
+
+def setup_queue(output_handlers):
+    global _listener
+    shutdown()
+
+    record_queue = queue.SimpleQueue()
+    queue_handler = _UnformattedQueueHandler(record_queue)
+    queue_handler.set_name(QUEUE_HANDLER_NAME)
+    register_handler(queue_handler)
+
+    _listener = handlers.QueueListener(record_queue, *output_handlers, respect_handler_level=True)
+    _listener.start()
 
 
 def register_handler(handler):
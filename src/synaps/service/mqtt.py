@@ -1,20 +1,90 @@
+import asyncio
+import functools
 import logging
-from datetime import datetime, timezone
-from typing import Dict, Any, Callable, List, Tuple
+import re
+import threading
+from typing import Dict, Any, Callable, List, Tuple, Iterable, Optional
 
 from gmqtt import Client
 
+from synaps.common import fastjson
+from synaps.common.timestamp import event_at
 from synaps.service.err import MissingConfigurationField, AlreadyRegistered
 
 logger = logging.getLogger(__name__)
 
 _brokers: Dict[str, Client] = {}
-_pending_subscriptions: List[Tuple[str, str, Callable[[str, str], None]]] = []
+# Messages are published by a flusher task per broker, which drains all pending messages in a single loop iteration
+_queues: Dict[str, asyncio.Queue] = {}
+_flusher_tasks: Dict[str, asyncio.Task] = {}
+_queues_version = 0  # Incremented when `_queues` changes, invalidates queues cached by publishers
+_loop: Optional[asyncio.AbstractEventLoop] = None
+_loop_thread_id: Optional[int] = None
+_pending_subscriptions: Dict[str, List[Tuple[str, Callable[[str, str], None]]]] = {}  # By broker name
 
 _missing_brokers = set()
 
 REQUIRED_FIELDS = ['name', 'host']
 
+QUEUE_SIZE = 10000
+BATCH_SIZE = 100
+
+
+class _TopicMatcher:
+    """
+    Resolves handlers for a topic of a received message. Exact topics are resolved by a single dict lookup,
+    only topic filters with `+` or `#` wildcards are matched by their compiled patterns.
+    """
+
+    __slots__ = ('_exact', '_wildcards', '_wildcard_patterns')
+
+    def __init__(self):
+        self._exact: Dict[str, List[Callable[[str, str], None]]] = {}
+        self._wildcards: Dict[str, List[Callable[[str, str], None]]] = {}
+        self._wildcard_patterns: Tuple[Tuple[Callable, List[Callable[[str, str], None]]], ...] = ()
+
+    def add(self, topic_filter: str, handler: Callable[[str, str], None]) -> bool:
+        """
+        :return: True if the topic filter was not added before, i.e. it must be subscribed
+        """
+        is_wildcard = '+' in topic_filter or '#' in topic_filter
+        filters = self._wildcards if is_wildcard else self._exact
+        handlers = filters.get(topic_filter)
+        if handlers is not None:
+            handlers.append(handler)
+            return False
+
+        filters[topic_filter] = [handler]
+        if is_wildcard:
+            self._wildcard_patterns = tuple(
+                (re.compile(_topic_filter_regex(f)).fullmatch, h) for f, h in self._wildcards.items())
+        return True
+
+    def match(self, topic: str) -> List[Callable[[str, str], None]]:
+        handlers = self._exact.get(topic, ())
+        if not self._wildcard_patterns:
+            return handlers
+
+        matched = list(handlers)
+        for fullmatch, wildcard_handlers in self._wildcard_patterns:
+            if fullmatch(topic):
+                matched.extend(wildcard_handlers)
+        return matched
+
+
+def _topic_filter_regex(topic_filter: str) -> str:
+    levels = topic_filter.split('/')
+    multi_level = levels[-1] == '#'
+    if multi_level:
+        levels.pop()
+
+    regex = '/'.join('[^/]*' if level == '+' else re.escape(level) for level in levels)
+    if multi_level:
+        regex = regex + '(/.*)?' if levels else '.*'
+    if topic_filter[0] in '+#':
+        regex = r'(?!\$)' + regex  # Wildcards on the first level do not match `$` topics
+    return regex
+
 
 def get_broker(broker):
     try:
@@ -23,6 +93,84 @@ def get_broker(broker):
         raise ValueError(f"Broker {broker} not registered")
 
 
+def _resolve_queue(broker: str) -> Optional[asyncio.Queue]:
+    """
+    :return: publish queue of the broker or None if the broker is not registered
+    """
+    queue = _queues.get(broker)
+    if not queue:
+        if broker not in _missing_brokers:
+            _missing_brokers.add(broker)
+            logger.warning(f"[missing_mqtt_broker] broker=[{broker}]")
+        return None
+
+    if _missing_brokers:  # Usually empty, avoids the set lookup on every publish
+        _missing_brokers.discard(broker)
+    return queue
+
+
+def _enqueue(queue: asyncio.Queue, broker: str, topic: str, payload: Any):
+    # RPIO observers send from the pin factory thread, the queue must be accessed from the event loop thread only
+    if threading.get_ident() == _loop_thread_id:
+        _put(queue, broker, topic, payload)
+    else:
+        _loop.call_soon_threadsafe(_put, queue, broker, topic, payload)
+
+
+def _put(queue: asyncio.Queue, broker: str, topic: str, payload: Any):
+    try:
+        queue.put_nowait((topic, payload))
+    except asyncio.QueueFull:
+        logger.warning("[mqtt_message_dropped] broker=[%s] topic=[%s] reason=[queue_full]", broker, topic)
+
+
+def _publish(client: Client, broker: str, topic: str, payload: Any):
+    # A failed message must not stop the flusher task, the remaining messages would never be published
+    try:
+        client.publish(topic, payload)
+    except Exception:
+        logger.exception("[mqtt_publish_error] broker=[%s] topic=[%s]", broker, topic)
+        return
+    logger.debug("[mqtt_message_published] broker=[%s] topic=[%s] payload=[%s]", broker, topic, payload)
+
+
+async def _flush_loop(broker: str, client: Client, queue: asyncio.Queue):
+    while True:
+        topic, payload = await queue.get()
+        _publish(client, broker, topic, payload)
+        # Publish up to a batch of messages queued meanwhile, so the writes are flushed by the transport together
+        for _ in range(BATCH_SIZE - 1):
+            try:
+                topic, payload = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                break
+            _publish(client, broker, topic, payload)
+        await asyncio.sleep(0)  # Yield after each batch, a large backlog must not starve the other tasks
+
+
+async def _stop_flusher(broker: str, client: Client):
+    task = _flusher_tasks.pop(broker)
+    task.cancel()  # No-op if the task already failed
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    except Exception:
+        logger.exception("[mqtt_flusher_failed] broker=[%s]", broker)
+
+    queue = _queues.pop(broker)
+    _queues_changed()
+    while not queue.empty():
+        topic, payload = queue.get_nowait()
+        if client.is_connected:
+            _publish(client, broker, topic, payload)
+
+
+def _queues_changed():
+    global _queues_version
+    _queues_version += 1
+
+
 def send_device_payload(broker: str, topic: str, payload: Any):
     """
     Send a device event to an MQTT broker.
@@ -32,16 +180,8 @@ def send_device_payload(broker: str, topic: str, payload: Any):
         topic: The MQTT topic to publish the event to
         payload: Payload to be sent
     """
-    client = _brokers.get(broker)
-    if not client:
-        if broker not in _missing_brokers:
-            _missing_brokers.add(broker)
-            logger.warning(f"[missing_mqtt_broker] broker=[{broker}]")
-        return
-
-    _missing_brokers.discard(broker)
-    client.publish(topic, payload)
-    logger.debug(f"[mqtt_message_published] broker=[{broker}] topic=[{topic}] payload=[{payload}]")
+    if queue := _resolve_queue(broker):
+        _enqueue(queue, broker, topic, payload)
 
 
 def send_device_event(broker: str, topic: str, device_id: str, event_type: str, event_data: Dict[str, Any]):
@@ -55,40 +195,121 @@ def send_device_event(broker: str, topic: str, device_id: str, event_type: str,
         event_type: The type of event (e.g., 'relay_state_change', 'switch_state_change')
         event_data: The data specific to the event
     """
-    payload = {
-        "deviceId": device_id,
-        "event": event_type,
-        "eventAt": datetime.now(timezone.utc).isoformat(),
-        "eventData": event_data,
-    }
-    send_device_payload(broker, topic, payload)
+    send_device_payload(broker, topic, device_event_payload(device_id, event_type, fastjson.dumps_bytes(event_data)))
 
 
-def on_connect(client, flags, rc, properties):
-    props = client.config_x
-    if rc == 0:
-        logger.info(f"[mqtt_connected] broker=[{props['name']}] host=[{props['host']}]")
-    else:
-        logger.warning(f"[mqtt_connection_failed] broker=[{props['name']}] host=[{props['host']}]")
+class Publisher:
+    """
+    Publishes payloads to a topic of a broker. The broker is resolved on the first publish after it is registered
+    and then kept until a broker is (un)registered, so the observers publishing for every event skip the lookup.
+    """
 
+    __slots__ = ('broker', 'topic', '_queue', '_queues_version')
 
-def on_disconnect(client, packet, exc=None):
-    props = client.config_x
-    logger.info(f"[mqtt_disconnected] broker=[{props['name']}] host=[{props['host']}]")
+    def __init__(self, broker: str, topic: str):
+        self.broker = broker
+        self.topic = topic
+        self._queue: Optional[asyncio.Queue] = None
+        self._queues_version = -1
 
+    def __call__(self, payload: Any):
+        queue = self._queue
+        if queue is None or self._queues_version != _queues_version:
+            self._queues_version = _queues_version
+            queue = self._queue = _resolve_queue(self.broker)
+            if queue is None:
+                return
 
-def on_message(client, topic, payload, qos, properties):
-    props = client.config_x
-    broker_name = props['name']
-    payload_str = payload.decode('utf-8') if isinstance(payload, bytes) else str(payload)
-    logger.debug(f"[mqtt_message_received] broker=[{broker_name}] topic=[{topic}] payload=[{payload_str}]")
+        _enqueue(queue, self.broker, self.topic, payload)
+
+
+def get_publisher(broker: str, topic: str) -> Publisher:
+    """
+    Args:
+        broker: The name of the broker, it doesn't have to be registered yet
+        topic: The MQTT topic to publish to
+    Returns:
+        Callable publishing given payload to the topic of the broker
+    """
+    return Publisher(broker, topic)
+
+
+def send_device_events(broker: str, topics: Iterable[str], device_id: str, event_type: str,
+                       event_data: Dict[str, Any]):
+    """
+    Send a device event to multiple topics of an MQTT broker. The broker is resolved, and the payload
+    serialized, only once.
+
+    Args:
+        broker: The name of the broker to send the event to
+        topics: The MQTT topics to publish the event to
+        device_id: The identifier for the device
+        event_type: The type of event (e.g., 'relay_state_change', 'switch_state_change')
+        event_data: The data specific to the event
+    """
+    queue = _resolve_queue(broker)
+    if not queue:
+        return
+
+    payload = device_event_payload(device_id, event_type, fastjson.dumps_bytes(event_data))
+    for topic in topics:
+        _enqueue(queue, broker, topic, payload)
+
+
+def device_event_payload(device_id: str, event_type: str, event_data: bytes) -> bytes:
+    """
+    :return: serialized device event with the event data already serialized to JSON,
+             so constant event data can be serialized once instead of for every event
+    """
+    return b''.join((
+        _event_payload_prefix(device_id, event_type),
+        fastjson.dumps_bytes(event_at()),
+        b',"eventData":',
+        event_data,
+        b'}'
+    ))
+
+
+@functools.lru_cache(maxsize=256)
+def _event_payload_prefix(device_id: str, event_type: str) -> bytes:
+    """
+    :return: serialized static part of the device event payload, open for the `eventAt` value
+    """
+    return fastjson.dumps_bytes({"deviceId": device_id, "event": event_type})[:-1] + b',"eventAt":'
 
-    handlers = props.get('_handlers', {}).get(topic, [])
-    for handler in handlers:
-        try:
-            handler(topic, payload_str)
-        except Exception as e:
-            logger.error(f"[mqtt_handler_error] broker=[{broker_name}] topic=[{topic}] error=[{e}]")
+
+def _bind_callbacks(client: Client, name: str, host: str, topic_matcher: _TopicMatcher):
+    """
+    The callbacks are closures over the broker properties, so no config lookups are done for each message.
+    """
+    match = topic_matcher.match
+
+    def on_connect(_client, flags, rc, properties):
+        if rc == 0:
+            logger.info(f"[mqtt_connected] broker=[{name}] host=[{host}]")
+        else:
+            logger.warning(f"[mqtt_connection_failed] broker=[{name}] host=[{host}]")
+
+    def on_disconnect(_client, packet, exc=None):
+        logger.info(f"[mqtt_disconnected] broker=[{name}] host=[{host}]")
+
+    def on_message(_client, topic, payload, qos, properties):
+        handlers = match(topic)
+        if not handlers:
+            return  # Skip decoding messages without a handler
+
+        payload_str = payload.decode('utf-8') if isinstance(payload, bytes) else str(payload)
+        logger.debug("[mqtt_message_received] broker=[%s] topic=[%s] payload=[%s]", name, topic, payload_str)
+
+        for handler in handlers:
+            try:
+                handler(topic, payload_str)
+            except Exception as e:
+                logger.error(f"[mqtt_handler_error] broker=[{name}] topic=[{topic}] error=[{e}]")
+
+    client.on_connect = on_connect
+    client.on_disconnect = on_disconnect
+    client.on_message = on_message
 
 
 def subscribe(broker: str, topic: str, handler: Callable[[str, str], None]):
@@ -102,7 +323,7 @@ def subscribe(broker: str, topic: str, handler: Callable[[str, str], None]):
     """
     client = _brokers.get(broker)
     if not client:
-        _pending_subscriptions.append((broker, topic, handler))
+        _pending_subscriptions.setdefault(broker, []).append((topic, handler))
         logger.debug(f"[mqtt_subscription_pending] broker=[{broker}] topic=[{topic}]")
         return
 
@@ -111,29 +332,18 @@ def subscribe(broker: str, topic: str, handler: Callable[[str, str], None]):
 
 def _add_subscription(client: Client, topic: str, handler: Callable[[str, str], None]):
     props = client.config_x
-    if '_handlers' not in props:
-        props['_handlers'] = {}
-
-    if topic not in props['_handlers']:
-        props['_handlers'][topic] = []
+    if props['_topic_matcher'].add(topic, handler):
         client.subscribe(topic)
         logger.info(f"[mqtt_subscribed] broker=[{props['name']}] topic=[{topic}]")
 
-    props['_handlers'][topic].append(handler)
-
 
 def _process_pending_subscriptions(broker_name: str, client: Client):
-    global _pending_subscriptions
-    remaining = []
-    for broker, topic, handler in _pending_subscriptions:
-        if broker == broker_name:
-            _add_subscription(client, topic, handler)
-        else:
-            remaining.append((broker, topic, handler))
-    _pending_subscriptions = remaining
+    for topic, handler in _pending_subscriptions.pop(broker_name, ()):
+        _add_subscription(client, topic, handler)
 
 
 async def register(**config):
+    global _loop, _loop_thread_id
     for required_field in REQUIRED_FIELDS:
         if required_field not in config or not config[required_field]:
             raise MissingConfigurationField(required_field)
@@ -150,21 +360,31 @@ async def register(**config):
 
     client = Client(client_id=name)
     client.config_x = config
-
-    client.on_connect = on_connect
-    client.on_disconnect = on_disconnect
-    client.on_message = on_message
+    config['_topic_matcher'] = topic_matcher = _TopicMatcher()
+    _bind_callbacks(client, name, host, topic_matcher)
 
     logger.info(f"[mqtt_connecting] broker=[{name}] host=[{host}]")
     await client.connect(host=host)
 
+    _loop = asyncio.get_running_loop()
+    _loop_thread_id = threading.get_ident()
+    queue = asyncio.Queue(maxsize=QUEUE_SIZE)
+    _flusher_tasks[name] = asyncio.create_task(_flush_loop(name, client, queue))
+    _queues[name] = queue
+    _queues_changed()
+
     _brokers[name] = client
     _process_pending_subscriptions(name, client)
 
 
 async def unregister_all():
-    for name, client in list(_brokers.items()):
+    global _loop, _loop_thread_id
+    while _brokers:
+        name, client = _brokers.popitem()
+        await _stop_flusher(name, client)
         if client.is_connected:
             logger.info(f"[disconnecting_mqtt] broker=[{name}]")
             await client.disconnect()
-        del _brokers[name]
+
+    _loop = None
+    _loop_thread_id = None
@@ -0,0 +1,51 @@
+import logging
+from typing import Tuple, Optional, Awaitable
+
+from synaps.common import fastjson
+from synaps.service import mqtt, ws
+
+log = logging.getLogger(__name__)
+
+PRESENCE_CHANGE = "presence_change"
+
+# Serialized once, presence events only splice the timestamp into the payload
+_PRESENCE_EVENT_DATA = {presence: fastjson.dumps_bytes({"presence": presence}) for presence in (True, False)}
+
+
+def _presence_event_data(presence) -> bytes:
+    return _PRESENCE_EVENT_DATA.get(presence) or fastjson.dumps_bytes({"presence": presence})
+
+
+class PresenceFanout:
+    """
+    A single presence handler observer sending the presence change event of a sensor to all its MQTT topics
+    and WS endpoints.
+    """
+
+    __slots__ = ('device_id', 'mqtt_publishers', 'ws_endpoints')
+
+    def __init__(self, device_id: str, mqtt_topics: Tuple[Tuple[str, str], ...], ws_endpoints: Tuple[str, ...]):
+        self.device_id = device_id
+        self.mqtt_publishers = tuple(mqtt.get_publisher(broker, topic) for broker, topic in mqtt_topics)
+        self.ws_endpoints = ws_endpoints
+
+    def __bool__(self):
+        return bool(self.mqtt_publishers or self.ws_endpoints)
+
+    def __call__(self, presence) -> Optional[Awaitable[None]]:
+        if self.mqtt_publishers:
+            payload = mqtt.device_event_payload(self.device_id, PRESENCE_CHANGE, _presence_event_data(presence))
+            for publisher in self.mqtt_publishers:
+                try:
+                    publisher(payload)
+                except Exception:  # Must not prevent sending to the other topics and endpoints
+                    log.exception("[presence_mqtt_publish_error] device=[%s] broker=[%s] topic=[%s]",
+                                  self.device_id, publisher.broker, publisher.topic)
+
+        if self.ws_endpoints:
+            return self._send_ws(presence)  # Awaited by the presence handler
+        return None
+
+    async def _send_ws(self, presence):
+        for endpoint in self.ws_endpoints:
+            await ws.send_device_event(endpoint, self.device_id, PRESENCE_CHANGE, {"presence": presence})
@@ -1,8 +1,9 @@
 import asyncio
+import inspect
 import logging
 import time
 from abc import ABC
-from typing import Optional, Union, List, Iterable, Awaitable
+from typing import Optional, Union, List, Iterable, Tuple, Set
 
 from gpiozero import Button, OutputDevice
 
@@ -11,36 +12,84 @@ from synaps.common.switch import SwitchEvent, SwitchState
 
 log = logging.getLogger(__name__)
 
+_observer_tasks: Set[asyncio.Task] = set()  # Strong references to running async observers
+
+
+def _is_async_observer(callback) -> bool:
+    # Also covers instances of classes with `async def __call__`
+    return inspect.iscoroutinefunction(callback) or inspect.iscoroutinefunction(type(callback).__call__)
+
+
+def _split_observers(observers) -> Tuple[Tuple, Tuple]:
+    """
+    :return: sync and async observers, split once on (un)registration instead of checking each result
+    """
+    return (tuple(o for o in observers if not _is_async_observer(o)),
+            tuple(o for o in observers if _is_async_observer(o)))
+
+
+def _run_async_observers(loop: asyncio.AbstractEventLoop, observers, event):
+    for observer in observers:
+        _track(loop.create_task(observer(event)))
+
+
+def _run_awaitable(loop: asyncio.AbstractEventLoop, awaitable):
+    _track(asyncio.ensure_future(awaitable, loop=loop))
+
+
+def _track(task: asyncio.Future):
+    if not task.done():  # Could have completed eagerly
+        _observer_tasks.add(task)
+        task.add_done_callback(_observer_tasks.discard)
+
+
+def _notify_sync_observers(loop: asyncio.AbstractEventLoop, observers, event):
+    for observer in observers:
+        result = observer(event)
+        # Sync callables can still return an awaitable, e.g. a lambda or a partial of an async function
+        if result is not None and inspect.isawaitable(result):
+            loop.call_soon_threadsafe(_run_awaitable, loop, result)
+
 
 class InputSwitch:
+    __slots__ = ('button', 'device_id', 'observers', '_sync_observers', '_async_observers', 'event_loop',
+                 '_pressed_event', '_released_event', '__weakref__')
 
-    def __init__(self, device_id, button: Button):
+    def __init__(self, device_id, button: Button, *, event_loop: Optional[asyncio.AbstractEventLoop] = None):
         self.button = button
         self.device_id = device_id
-        self.observers = []
-        self.event_loop = asyncio.get_running_loop()
+        self.observers = ()  # Copy-on-write, button callbacks iterate it from the pin factory thread
+        self._sync_observers = ()
+        self._async_observers = ()
+        self._pressed_event = SwitchEvent(device_id, SwitchState.PRESSED)
+        self._released_event = SwitchEvent(device_id, SwitchState.RELEASED)
+        self.event_loop = event_loop or asyncio.get_running_loop()
         self.button.when_pressed = self._on_pressed
         self.button.when_released = self._on_released
 
     def add_observer(self, callback):
-        self.observers.append(callback)
+        self._set_observers(self.observers + (callback,))
 
     def remove_observer(self, callback):
-        self.observers.remove(callback)
+        observers = list(self.observers)
+        observers.remove(callback)
+        self._set_observers(tuple(observers))
+
+    def _set_observers(self, observers):
+        self.observers = observers
+        self._sync_observers, self._async_observers = _split_observers(observers)
 
     def _on_pressed(self):
-        event = SwitchEvent(self.device_id, SwitchState.PRESSED)
-        for observer in self.observers:
-            result = observer(event)
-            if isinstance(result, Awaitable):
-                asyncio.run_coroutine_threadsafe(result, self.event_loop)
+        self._notify_observers(self._pressed_event)
 
     def _on_released(self):
-        event = SwitchEvent(self.device_id, SwitchState.RELEASED)
-        for observer in self.observers:
-            result = observer(event)
-            if isinstance(result, Awaitable):
-                asyncio.run_coroutine_threadsafe(result, self.event_loop)
+        self._notify_observers(self._released_event)
+
+    def _notify_observers(self, event: SwitchEvent):
+        # The tuple is a snapshot, not affected by concurrent (un)registration
+        _notify_sync_observers(self.event_loop, self._sync_observers, event)
+        if async_observers := self._async_observers:
+            self.event_loop.call_soon_threadsafe(_run_async_observers, self.event_loop, async_observers, event)
 
     def close(self):
         self.button.close()
@@ -52,26 +101,37 @@ class OutputRelay:
     Now uses RelayState enum for state management and includes a
     cooldown to prevent rapid toggling.
     """
+    __slots__ = ('device_id', 'output_device', 'observers', '_sync_observers', '_async_observers', 'event_loop',
+                 '_toggle_cooldown_ns', '_last_toggle_ns', '__weakref__')
 
     def __init__(self, device_id: str, output_device: OutputDevice,
-                 *, initial_state: Optional[bool] = None, toggle_cooldown: float = 0.5):
+                 *, initial_state: Optional[bool] = None, toggle_cooldown: float = 0.5,
+                 event_loop: Optional[asyncio.AbstractEventLoop] = None):
         self.device_id = device_id
         self.output_device = output_device
-        self.observers = []
-        self.event_loop = asyncio.get_running_loop()
-        self._toggle_cooldown = toggle_cooldown
-        self._last_toggle_time = 0.0
+        self.observers = ()  # Copy-on-write, notified from the pin factory and the event loop threads
+        self._sync_observers = ()
+        self._async_observers = ()
+        self.event_loop = event_loop or asyncio.get_running_loop()
+        self._toggle_cooldown_ns = int(toggle_cooldown * 1_000_000_000)
+        self._last_toggle_ns = 0
 
         if initial_state is not None:
             self.set_state(initial_state)
 
     def add_observer(self, callback):
         """Add an observer callback that will be called when the relay state changes."""
-        self.observers.append(callback)
+        self._set_observers(self.observers + (callback,))
 
     def remove_observer(self, callback):
         """Remove an observer callback."""
-        self.observers.remove(callback)
+        observers = list(self.observers)
+        observers.remove(callback)
+        self._set_observers(tuple(observers))
+
+    def _set_observers(self, observers):
+        self.observers = observers
+        self._sync_observers, self._async_observers = _split_observers(observers)
 
     def __call__(self, e: SwitchEvent):
         if e.switch_state == SwitchState.PRESSED:
@@ -104,12 +164,12 @@ class OutputRelay:
 
     def toggle(self):
         """Toggle the relay state, but only if the cooldown has elapsed."""
-        current_time = time.time()
-        if current_time - self._last_toggle_time < self._toggle_cooldown:
+        now_ns = time.monotonic_ns()  # Not affected by system clock changes, integer arithmetic
+        if now_ns - self._last_toggle_ns < self._toggle_cooldown_ns:
             log.warning(f"[relay_toggle_ignored] device=[{self.device_id}] reason=[toggle_in_cooldown]")
             return
 
-        self._last_toggle_time = current_time
+        self._last_toggle_ns = now_ns
         self.output_device.toggle()
         # Determine the new state based on output device value.
         new_state = RelayState.ON if self.output_device.value == 1 else RelayState.OFF
@@ -122,10 +182,9 @@ class OutputRelay:
     def _notify_observers(self, state: RelayState):
         """Notify all observers about the relay state change."""
         event = RelayEvent(self.device_id, state)
-        for observer in self.observers:
-            result = observer(event)
-            if isinstance(result, Awaitable):
-                asyncio.run_coroutine_threadsafe(result, self.event_loop)
+        _notify_sync_observers(self.event_loop, self._sync_observers, event)
+        if async_observers := self._async_observers:
+            self.event_loop.call_soon_threadsafe(_run_async_observers, self.event_loop, async_observers, event)
 
     def close(self):
         """Clean up resources."""
@@ -1,17 +1,18 @@
 import logging
-from typing import List, Optional
+from typing import Optional, Tuple
 
 import serialio
 
 from sensation.sen0311 import SensorAsync, PresenceHandlerAsync
-from synaps.service import mqtt, ws
 from synaps.service.err import AlreadyRegistered
+from synaps.service.presence import PresenceFanout
 
 log = logging.getLogger(__name__)
 
 REQUIRED_FIELDS = ['port']
 
 _sensors = {}
+_all_sensors: Tuple[SensorAsync, ...] = ()  # Snapshot of `_sensors` values, rebuilt on (un)registration
 
 
 async def register(config):
@@ -20,6 +21,12 @@ async def register(config):
 
     sensor = await _init_sensor(config)
     _sensors[config['name']] = sensor
+    _update_all_sensors()
+
+
+def _update_all_sensors():
+    global _all_sensors
+    _all_sensors = tuple(_sensors.values())
 
 
 async def _init_sensor(config):
@@ -45,19 +52,13 @@ async def _init_sensor(config):
             handler.observers.append(
                 lambda presence_val: log.info(f"[sen0311_presence_change] sensor=[{s.sensor_id}] presence=[{presence_val}]"))
 
-        for mc in presence.get_list("mqtt"):
-            broker = mc['broker']
-            topic = mc['topic']
-            handler.observers.append(
-                lambda presence_val, b=broker, t=topic:
-                mqtt.send_device_event(b, t, str(s.sensor_id), "presence_change", {"presence": presence_val})
-            )
-
-        for wc in presence.get_list("ws"):
-            endpoint = wc['endpoint']
-            handler.observers.append(
-                lambda presence_val, e=endpoint:
-                ws.send_device_event(e, str(s.sensor_id), "presence_change", {"presence": presence_val}))
+        # All destinations are notified by a single observer
+        fanout = PresenceFanout(
+            str(s.sensor_id),
+            tuple((mc['broker'], mc['topic']) for mc in presence.get_list("mqtt")),
+            tuple(wc['endpoint'] for wc in presence.get_list("ws")))
+        if fanout:
+            handler.observers.append(fanout)
 
     # TODO Handling exceptions from start methods to not prevent registration
     if config.get('enabled'):
@@ -66,8 +67,8 @@ async def _init_sensor(config):
     return s
 
 
-def get_all_sensors() -> List[SensorAsync]:
-    return list(_sensors.values())
+def get_all_sensors() -> Tuple[SensorAsync, ...]:
+    return _all_sensors
 
 
 def get_sensor(name) -> Optional[SensorAsync]:
@@ -75,6 +76,7 @@ def get_sensor(name) -> Optional[SensorAsync]:
 
 
 async def unregister_all():
-    for name, sensor in list(_sensors.items()):
+    while _sensors:
+        _, sensor = _sensors.popitem()
+        _update_all_sensors()
         await sensor.close()
-        del _sensors[name]
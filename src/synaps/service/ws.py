@@ -1,12 +1,13 @@
 import logging
 import asyncio
+import contextlib
 from asyncio import Task
-from datetime import datetime, timezone
-from typing import Dict, Set, Tuple, Any
+from typing import Dict, Set, Tuple, Any, Optional
 
 import websockets
-from rich import json
 
+from synaps.common import fastjson
+from synaps.common.timestamp import event_at
 from synaps.service.err import MissingConfigurationField, AlreadyRegistered
 
 logger = logging.getLogger(__name__)
@@ -17,6 +18,8 @@ _missing_endpoints: Set[str] = set()
 
 REQUIRED_FIELDS = ['name', 'uri']
 
+OUTBOX_SIZE = 1000
+
 
 def get_client(endpoint_name) -> 'WSClient':
     try:
@@ -32,13 +35,19 @@ class WSClient:
         self.websocket = None
         self.closed = False
         self.connected_event = asyncio.Event()
+        self.outbox: asyncio.Queue = asyncio.Queue(maxsize=OUTBOX_SIZE)
+        self.send_task: Optional[Task] = None
 
     async def handle_connection(self):
         logger.info(f"[websocket_connecting] endpoint=[{self.name}] uri=[{self.uri}]")
-        async for websocket in websockets.connect(self.uri):
+        # Events are tiny, compressing them only adds latency; a larger write buffer absorbs event bursts
+        async for websocket in websockets.connect(self.uri, compression=None, write_limit=2 ** 20,
+                                                  ping_interval=20, ping_timeout=20, open_timeout=5):
             logger.info(f"[websocket_connected] endpoint=[{self.name}] uri=[{self.uri}]")
+            self._discard_outbox()  # Events queued during the previous connection are outdated now
             self.websocket = websocket
             self.connected_event.set()
+            send_task = self.send_task = asyncio.create_task(self.send_loop(websocket))
 
             try:
                 await self.print_message_loop()
@@ -46,6 +55,8 @@ class WSClient:
                 logger.info(f"[websocket_disconnected] endpoint=[{self.name}] uri=[{self.uri}]")
                 if self.closed:
                     return
+            finally:
+                send_task.cancel()
 
             logger.info(f"[websocket_reconnecting] endpoint=[{self.name}] uri=[{self.uri}]")
             self.connected_event.clear()
@@ -60,14 +71,52 @@ class WSClient:
 
     async def print_message_loop(self):
         async for message in self.websocket:
-            logger.debug(f"[websocket_message_received] endpoint=[{self.name}] message=[{message}]")
+            logger.debug("[websocket_message_received] endpoint=[%s] message=[%s]", self.name, message)
+
+    def _discard_outbox(self):
+        discarded = 0
+        while not self.outbox.empty():
+            self.outbox.get_nowait()
+            discarded += 1
+        if discarded:
+            logger.warning("[websocket_messages_discarded] endpoint=[%s] count=[%s] reason=[reconnected]",
+                           self.name, discarded)
+
+    async def send_loop(self, websocket):
+        """
+        Sends queued messages of the connection. Getting already queued messages doesn't suspend,
+        so all messages queued meanwhile are sent together.
+        """
+        while True:
+            if not await self._send(websocket, await self.outbox.get()):
+                return
+
+    async def _send(self, websocket, message) -> bool:
+        """
+        :return: False if the connection is closed
+        """
+        try:
+            await websocket.send(message)
+        except websockets.ConnectionClosed:
+            logger.warning(f"[websocket_message_not_sent] reason=[disconnected] message=[{message}]")
+            return False
+        except Exception:  # A failed message must not stop sending of the following ones
+            logger.exception("[websocket_send_error] endpoint=[%s] message=[%s]", self.name, message)
+            return True
+        logger.debug("[websocket_message_sent] endpoint=[%s] message=[%s]", self.name, message)
+        return True
 
     async def send_message(self, message, timeout=None):
+        """
+        Queue the message to be sent by the send loop of the current connection.
+        """
         if timeout:
             await self.wait_connected(timeout)
         if self.websocket:
-            await self.websocket.send(message)
-            logger.debug(f"[websocket_message_sent] endpoint=[{self.name}] message=[{message}]")
+            try:
+                self.outbox.put_nowait(message)
+            except asyncio.QueueFull:
+                logger.warning(f"[websocket_message_not_sent] reason=[outbox_full] message=[{message}]")
         else:
             logger.warning(f"[websocket_message_not_sent] reason=[disconnected] message=[{message}]")
 
@@ -77,6 +126,14 @@ class WSClient:
         if not self.websocket:
             return False
 
+        if self.send_task:  # Stop the send loop first, so the remaining messages are sent in order
+            self.send_task.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self.send_task
+
+        while not self.outbox.empty():  # Flush messages not taken by the send loop
+            if not await self._send(self.websocket, self.outbox.get_nowait()):
+                break
         await self.websocket.close()
         return True
 
@@ -119,23 +176,26 @@ async def send_device_event(endpoint_name: str, device_id: str, event_type: str,
             logger.warning(f"[websocket_endpoint_missing] name=[{endpoint_name}]")
         return
 
-    _missing_endpoints.discard(endpoint_name)
+    if _missing_endpoints:  # Usually empty, avoids the set lookup on every send
+        _missing_endpoints.discard(endpoint_name)
 
     payload = {
         "deviceId": device_id,
         "event": event_type,
-        "eventAt": datetime.now(timezone.utc).isoformat(),
+        "eventAt": event_at(),
         "eventData": event_data,
     }
-    await client.send_message(json.dumps(payload))
-    logger.debug(f"[websocket_device_event_sent] endpoint=[{endpoint_name}] device=[{device_id}] event=[{event_type}]")
+    # Sent as str, bytes would be sent as a binary frame
+    await client.send_message(fastjson.dumps(payload))
+    logger.debug("[websocket_device_event_sent] endpoint=[%s] device=[%s] event=[%s]",
+                 endpoint_name, device_id, event_type)
 
 
 async def unregister_all():
-    for name, (client, task) in list(_clients.items()):
+    while _clients:
+        name, (client, task) = _clients.popitem()
         if not client.closed:
             logger.info(f"[websocket_closing_connection] endpoint=[{name}]")
             if not await client.close():
                 task.cancel()
                 await task
-        del _clients[name]